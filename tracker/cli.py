@@ -5,6 +5,7 @@ Command-line interface for expense tracker.
 import argparse
 from datetime import datetime
 import logging
+from operator import itemgetter
 import sys
 from typing import Optional
 from tracker.service import ExpenseService
@@ -14,10 +15,16 @@ from tracker.logger import setup_logging
 logger = logging.getLogger(__name__)
 
 
+def _log_args(args):
+    """Log the non-empty command arguments, skipping the join when INFO is off."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(" | ".join(f"{k}:{v}" for k,v in vars(args).items() if v not in [None, ""]))
+
+
 def cmd_add(args, service: ExpenseService):
     """Handle add command."""
     try:
-        logger.info(" | ".join(f"{k}:{v}" for k,v in vars(args).items() if v not in [None, ""]))
+        _log_args(args)
         
         expense = service.add_expense(
             date=args.date,
@@ -30,11 +37,11 @@ def cmd_add(args, service: ExpenseService):
         print(f"Added: {expense}")
         
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Error adding expense: {e}")
+        logger.error("Error adding expense: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
 
@@ -42,7 +49,7 @@ def cmd_add(args, service: ExpenseService):
 def cmd_list(args, service: ExpenseService):
     """Handle list command."""
     try:
-        logger.info(" | ".join(f"{k}:{v}" for k,v in vars(args).items() if v not in [None, ""]))
+        _log_args(args)
         
         expenses = service.list_expenses(
             month=args.month,
@@ -58,17 +65,15 @@ def cmd_list(args, service: ExpenseService):
             print("No expenses found")
             return
 
-        print(f"\n{'ID':17s} | {'Date':10s} | {'Category':15s} | {'Amount':>14s} | Note")
-        print("-" * 80)
+        separator = "-" * 80
+        header = f"\n{'ID':17s} | {'Date':10s} | {'Category':15s} | {'Amount':>14s} | Note\n{separator}\n"
+        body = "\n".join(str(expense) for expense in expenses)
+        footer = f"\n{separator}\nTotal: {len(expenses)} expense(s)\n\n"
         
-        for expense in expenses:
-            print(expense)
-        
-        print("-" * 80)
-        print(f"Total: {len(expenses)} expense(s)\n")
+        sys.stdout.write(header + body + footer)
         
     except Exception as e:
-        logger.error(f"Error listing expenses: {e}")
+        logger.error("Error listing expenses: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
 
@@ -76,7 +81,7 @@ def cmd_list(args, service: ExpenseService):
 def cmd_summary(args, service: ExpenseService):
     """Handle summary command."""
     try:
-        logger.info(" | ".join(f"{k}:{v}" for k,v in vars(args).items() if v not in [None, ""]))
+        _log_args(args)
         
         summary = service.summary(
             month=args.month,
@@ -89,54 +94,52 @@ def cmd_summary(args, service: ExpenseService):
             print("No expenses found")
             return
         
-        print("\n" + "=" * 60)
-        print("EXPENSE SUMMARY")
-        print("=" * 60)
+        lines = ["", "=" * 60, "EXPENSE SUMMARY", "=" * 60]
         
         # Display filters if any
         if args.month:
-            print(f"Period: {args.month }")
+            lines.append(f"Period: {args.month}")
         elif getattr(args, 'from', None) or args.to:
             from_date = getattr(args, 'from', None) or "start"
             to_date = args.to or "end"
-            print(f"Period: {from_date} to {to_date}")
-
+            lines.append(f"Period: {from_date} to {to_date}")
         else:
-            print(f"Period: {datetime.now().strftime('%Y-%m')}")    
+            lines.append(f"Period: {datetime.now().strftime('%Y-%m')}")
         
         if args.category:
-            print(f"Category: {args.category}")
+            lines.append(f"Category: {args.category}")
         
-        print("-" * 60)
+        lines.append("-" * 60)
         
         # Category breakdown
-        print("Breakdown by Category:")
-        print("-" * 60)
+        lines.append("Breakdown by Category:")
+        lines.append("-" * 60)
         
         # Sort categories by amount (descending)
         sorted_categories = sorted(
             summary["totals_by_category"].items(),
-            key=lambda x: x[1],
+            key=itemgetter(1),
             reverse=True
         )
         
+        currency = summary["currency"]
+        grand_total = summary["grand_total"]
         for category, total in sorted_categories:
-            percentage = (total / summary["grand_total"] * 100) if summary["grand_total"] > 0 else 0
-            print(f"{category:20s}: {total:10.2f} {summary['currency']} ({percentage:5.1f}%)")
+            percentage = (total / grand_total * 100) if grand_total > 0 else 0
+            lines.append(f"{category:20s}: {total:10.2f} {currency} ({percentage:5.1f}%)")
         
-        print("-" * 60)
-        print(f"{'GRAND TOTAL':20s}: {summary['grand_total']:10.2f} {summary['currency']}")
-        print(f"{'Total Expenses':20s}: {summary['count']:10}")
-
-        print("-" * 60)
-        print(f"{'Average per Day':20s}: {summary['grand_total'] / 30:10.2f} {summary['currency']}")
-        print(f"{'Highest Expense':20s}: {summary['max_expense']:10.2f} {summary['currency']}")
-
-
-        print("=" * 60 + "\n")
+        lines.append("-" * 60)
+        lines.append(f"{'GRAND TOTAL':20s}: {grand_total:10.2f} {currency}")
+        lines.append(f"{'Total Expenses':20s}: {summary['count']:10}")
+        lines.append("-" * 60)
+        lines.append(f"{'Average per Day':20s}: {grand_total / 30:10.2f} {currency}")
+        lines.append(f"{'Highest Expense':20s}: {summary['max_expense']:10.2f} {currency}")
+        lines.append("=" * 60)
+        
+        sys.stdout.write("\n".join(lines) + "\n\n")
         
     except Exception as e:
-        logger.error(f"Error generating summary: {e}")
+        logger.error("Error generating summary: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
 
@@ -144,7 +147,7 @@ def cmd_summary(args, service: ExpenseService):
 def cmd_delete(args, service: ExpenseService):
     """Handle delete command."""
     try:
-        logger.info(" | ".join(f"{k}:{v}" for k,v in vars(args).items() if v not in [None, ""]))
+        _log_args(args)
         
         result = service.delete_expense(args.id)
         
@@ -155,7 +158,7 @@ def cmd_delete(args, service: ExpenseService):
             sys.exit(1)
             
     except Exception as e:
-        logger.error(f"Error deleting expense: {e}")
+        logger.error("Error deleting expense: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
 
@@ -163,7 +166,7 @@ def cmd_delete(args, service: ExpenseService):
 def cmd_edit(args, service: ExpenseService):
     """Handle edit command."""
     try:
-        logger.info(" | ".join(f"{k}:{v}" for k,v in vars(args).items() if v not in [None, ""]))
+        _log_args(args)
         
         updates = {}
         if args.amount is not None:
@@ -188,11 +191,11 @@ def cmd_edit(args, service: ExpenseService):
             sys.exit(1)
             
     except ValueError as e:
-        logger.error(f"Validation error: {e}")
+        logger.error("Validation error: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
     except Exception as e:
-        logger.error(f"Error editing expense: {e}")
+        logger.error("Error editing expense: %s", e)
         print(f"Error: {e}")
         sys.exit(1)
 
@@ -253,18 +256,26 @@ def main():
         sys.exit(1)
     
     # Initialize service
-    storage = ExpenseStorage()
+    try:
+        storage = ExpenseStorage()
+    except Exception as e:
+        logger.error("Error opening storage: %s", e)
+        print(e)
+        sys.exit(1)
     service = ExpenseService(storage)
     
     # Route to appropriate command handler
-    if args.command == "add":
-        cmd_add(args, service)
-    elif args.command == "list":
-        cmd_list(args, service)
-    elif args.command == "summary":
-        cmd_summary(args, service)
-    elif args.command == "delete":
-        cmd_delete(args, service)
-    elif args.command == "edit":
-        cmd_edit(args, service)
+    try:
+        if args.command == "add":
+            cmd_add(args, service)
+        elif args.command == "list":
+            cmd_list(args, service)
+        elif args.command == "summary":
+            cmd_summary(args, service)
+        elif args.command == "delete":
+            cmd_delete(args, service)
+        elif args.command == "edit":
+            cmd_edit(args, service)
+    finally:
+        storage.close()
 
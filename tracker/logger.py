@@ -4,13 +4,22 @@ import sys
 
 
 def setup_logging():
-    """Configure logging for the application."""
+    """
+    Configure logging for the application.
+    
+    The level defaults to INFO and can be changed with the
+    TRACKER_LOG_LEVEL environment variable (e.g. WARNING).
+    """
     os.makedirs("logs", exist_ok=True)
     
+    level = getattr(logging, os.environ.get("TRACKER_LOG_LEVEL", "INFO").upper(), None)
+    if not isinstance(level, int):
+        level = logging.INFO
+    
     logging.basicConfig(
-        level=logging.INFO,
+        level=level,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.FileHandler("logs/tracker.log"),
         ]
-    )
\ No newline at end of file
+    )
@@ -3,10 +3,10 @@ Data models for the expense tracker.
 """
 
 from dataclasses import dataclass, asdict
-from datetime import datetime
+from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Expense:
     """Represents a single expense entry."""
     id: str
@@ -15,7 +15,7 @@ class Expense:
     amount: float
     note: str = ""
     currency: str = "BDT"
-    created_at: str = datetime.now().isoformat(timespec='seconds')
+    created_at: Optional[str] = None  # set by the service when the expense is created
     
     def to_dict(self) -> dict:
         """Convert expense to dictionary."""
@@ -28,6 +28,8 @@ class Expense:
     
     def __str__(self) -> str:
         """String representation for display."""
-        return f"{self.id} | {self.date} | {self.category:15s} | {self.amount:10.2f} {self.currency} | {self.note}"
+        return "%s | %s | %-15s | %10.2f %s | %s" % (
+            self.id, self.date, self.category, self.amount, self.currency, self.note
+        )
 
 
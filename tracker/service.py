@@ -5,7 +5,7 @@ Business logic layer for expense operations.
 import logging
 from datetime import datetime
 from typing import List, Dict, Optional
-from tracker.utils import validate_date, validate_amount, generate_expense_id
+from tracker.utils import validate_date, validate_amount
 from tracker.models import Expense
 from tracker.storage import ExpenseStorage
 
@@ -61,8 +61,7 @@ class ExpenseService:
             raise ValueError("category is required")
         
         # Generate unique ID
-        existing_ids = self.storage.get_all_ids()
-        expense_id = generate_expense_id(date, existing_ids)
+        expense_id = self.storage.next_id(date)
         
         # Create and save expense
         expense = Expense(
@@ -71,11 +70,12 @@ class ExpenseService:
             category=category,
             amount=amount,
             note=note,
-            currency=currency
+            currency=currency,
+            created_at=datetime.now().isoformat(timespec="seconds")
         )
         
         self.storage.add_expense(expense)
-        logger.info(f"Added expense: {expense_id}")
+        logger.info("Added expense: %s", expense_id)
         
         return expense
     
@@ -108,32 +108,20 @@ class ExpenseService:
         Returns:
             List of filtered and sorted Expense objects
         """
-        expenses = self.storage.load_expenses()
-        
-        # Apply filters
-        filtered = self._apply_filters(
-            expenses,
+        # Filter, sort and limit in one indexed query
+        filtered = self.storage.query(
             month=month,
-            category=category,
+            category=category.strip().lower() if category else None,
             min_amount=min_amount,
             max_amount=max_amount,
             from_date=from_date,
-            to_date=to_date
+            to_date=to_date,
+            sort_by=sort_by,
+            descending=descending,
+            limit=limit
         )
         
-        # Sort
-        if sort_by == "amount":
-            filtered.sort(key=lambda x: x.amount, reverse=descending)
-        elif sort_by == "category":
-            filtered.sort(key=lambda x: x.category, reverse=descending)
-        else:  # date
-            filtered.sort(key=lambda x: x.date, reverse=descending)
-        
-        # Limit
-        if limit:
-            filtered = filtered[:limit]
-        
-        logger.info(f"Listed {len(filtered)} expenses")
+        logger.info("Listed %d expenses", len(filtered))
         return filtered
     
     def summary(
@@ -155,39 +143,36 @@ class ExpenseService:
         Returns:
             Dictionary with count, grand_total, and totals_by_category
         """
-        expenses = self.storage.load_expenses()
-        
-        # Apply filters
-        filtered = self._apply_filters(
-            expenses,
-            month=month,
-            category=category,
-            from_date=from_date,
-            to_date=to_date
-        )
-        
-        # Calculate totals
-        grand_total = sum(exp.amount for exp in filtered)
-
-        # Calculate highest expense
-        max_expense = max((exp.amount for exp in filtered), default=0.0)
+        filters = {
+            "month": month,
+            "category": category.strip().lower() if category else None,
+            "from_date": from_date,
+            "to_date": to_date
+        }
         
-        # Group by category
+        # Aggregate per category in SQL
+        count = 0
+        grand_total = 0.0
+        max_expense = 0.0
         category_totals = {}
-        for exp in filtered:
-            if exp.category not in category_totals:
-                category_totals[exp.category] = 0.0
-            category_totals[exp.category] += exp.amount
+        for cat, cat_count, cat_total, cat_max in self.storage.category_totals(**filters):
+            count += cat_count
+            grand_total += cat_total
+            max_expense = max(max_expense, cat_max)
+            category_totals[cat] = cat_total
+        
+        # Currency of the earliest matching expense
+        currency = self.storage.first_currency(**filters) if count else None
         
         summary_data = {
-            "count": len(filtered),
+            "count": count,
             "grand_total": grand_total,
             "totals_by_category": category_totals,
-            "currency": filtered[0].currency if filtered else "BDT",
+            "currency": currency or "BDT",
             "max_expense": max_expense
         }
         
-        logger.info(f"Generated summary: {len(filtered)} expenses, total {grand_total}")
+        logger.info("Generated summary: %d expenses, total %s", count, grand_total)
         return summary_data
     
     def delete_expense(self, expense_id: str) -> bool:
@@ -202,9 +187,9 @@ class ExpenseService:
         """
         result = self.storage.delete_expense(expense_id)
         if result:
-            logger.info(f"Deleted expense: {expense_id}")
+            logger.info("Deleted expense: %s", expense_id)
         else:
-            logger.warning(f"Expense not found: {expense_id}")
+            logger.warning("Expense not found: %s", expense_id)
         return result
     
     def edit_expense(self, expense_id: str, **updates) -> Optional[Expense]:
@@ -228,57 +213,7 @@ class ExpenseService:
         
         result = self.storage.update_expense(expense_id, updates)
         if result:
-            logger.info(f"Edited expense: {expense_id}")
+            logger.info("Edited expense: %s", expense_id)
         else:
-            logger.warning(f"Expense not found: {expense_id}")
+            logger.warning("Expense not found: %s", expense_id)
         return result
-    
-    def _apply_filters(
-        self,
-        expenses: List[Expense],
-        month: Optional[str] = None,
-        category: Optional[str] = None,
-        min_amount: Optional[float] = None,
-        max_amount: Optional[float] = None,
-        from_date: Optional[str] = None,
-        to_date: Optional[str] = None
-    ) -> List[Expense]:
-        """
-        Apply filters to expense list.
-        
-        Args:
-            expenses: List of expenses to filter
-            month: Filter by month (YYYY-MM format)
-            category: Filter by category
-            min_amount: Minimum amount filter
-            max_amount: Maximum amount filter
-            from_date: Start date filter
-            to_date: End date filter
-            
-        Returns:
-            Filtered list of expenses
-        """
-        filtered = expenses
-        
-        # Month filter
-        if month:
-            filtered = [exp for exp in filtered if exp.date.startswith(month)]
-        
-        # Date range filter
-        if from_date:
-            filtered = [exp for exp in filtered if exp.date >= from_date]
-        if to_date:
-            filtered = [exp for exp in filtered if exp.date <= to_date]
-        
-        # Category filter
-        if category:
-            category_lower = category.lower()
-            filtered = [exp for exp in filtered if exp.category == category_lower]
-        
-        # Amount filters
-        if min_amount is not None:
-            filtered = [exp for exp in filtered if exp.amount >= min_amount]
-        if max_amount is not None:
-            filtered = [exp for exp in filtered if exp.amount <= max_amount]
-        
-        return filtered
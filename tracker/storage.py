@@ -4,79 +4,310 @@ Storage layer for expense data persistence.
 
 import json
 import logging
+import sqlite3
+import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from tracker.models import Expense
+from tracker.utils import generate_expense_id
 
 logger = logging.getLogger(__name__)
 
+# Column order matches the Expense dataclass fields
+_COLUMNS = ("id", "date", "category", "amount", "note", "currency", "created_at")
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM expense"
+_INSERT = f"INSERT INTO expense ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expense (
+    id TEXT PRIMARY KEY,
+    date TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount REAL NOT NULL,
+    note TEXT NOT NULL DEFAULT '',
+    currency TEXT NOT NULL DEFAULT 'BDT',
+    created_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_expense_date ON expense(date);
+CREATE INDEX IF NOT EXISTS idx_expense_category ON expense(category, date);
+CREATE INDEX IF NOT EXISTS idx_expense_amount ON expense(amount);
+"""
+
+# PRAGMA user_version once the legacy JSON import has completed
+_MIGRATED_VERSION = 1
+
+# Sortable columns; ties keep date order, then insertion order
+_ORDER_BY = {
+    "date": "date {direction}, rowid",
+    "amount": "amount {direction}, date, rowid",
+    "category": "category {direction}, date, rowid",
+}
+
 
 class ExpenseStorage:
-    """Handles reading and writing expenses to JSON file."""
+    """Handles reading and writing expenses to a SQLite database."""
     
-    def __init__(self, filepath: str = "data/expenses.json"):
+    def __init__(self, filepath: str = "data/expenses.db"):
         """
         Initialize storage with filepath.
         
         Args:
-            filepath: Path to JSON file for storing expenses
+            filepath: Path to SQLite database file for storing expenses
         """
         self.filepath = Path(filepath)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._max_seq_by_date: Dict[str, int] = {}
         self._ensure_file_exists()
     
     def _ensure_file_exists(self):
-        """Create the data file and directory if they don't exist."""
+        """Create the database, its directory and schema if they don't exist."""
         try:
             self.filepath.parent.mkdir(parents=True, exist_ok=True)
             
-            if not self.filepath.exists():
-                self.filepath.write_text("[]")
-                logger.info(f"Created new expenses file: {self.filepath}")
+            self._conn = sqlite3.connect(self.filepath)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            
+            # Retried on every run until it completes
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < _MIGRATED_VERSION:
+                self._migrate_legacy()
+        except sqlite3.Error as e:
+            # "file is not a database" and "malformed" raise the base class;
+            # locked, read-only or unopenable files raise subclasses
+            if type(e) is sqlite3.DatabaseError:
+                logger.error("Corrupted database %s: %s", self.filepath, e)
+                raise Exception(f"Error: Corrupted data file. Please check {self.filepath}")
+            logger.error("Error opening database %s: %s", self.filepath, e)
+            raise Exception(f"Error: Could not open expenses database: {e}")
+        except OSError as e:
+            logger.error("Error opening database %s: %s", self.filepath, e)
+            raise Exception(f"Error: Could not open expenses database: {e}")
         except Exception as e:
-            logger.error(f"Error creating file {self.filepath}: {e}")
+            logger.error("Error creating database %s: %s", self.filepath, e)
             raise
     
-    def load_expenses(self) -> List[Expense]:
+    def _migrate_legacy(self):
         """
-        Load all expenses from file.
+        Import expenses from an old expenses.jsonl or expenses.json file, if present.
+        
+        The rows and the completion marker (PRAGMA user_version) are written
+        in one transaction, so a failed import leaves nothing behind and is
+        attempted again on the next run. Rows whose ID is already stored are
+        skipped, which keeps a retry from duplicating them.
         
-        Returns:
-            List of Expense objects
-            
         Raises:
-            Exception: If file cannot be read or parsed
+            Exception: If the legacy file cannot be parsed, holds the same
+                ID more than once or has rows missing required values
         """
+        jsonl = self.filepath.with_suffix(".jsonl")
+        legacy = self.filepath.with_suffix(".json")
+        
+        if jsonl.exists():
+            source = jsonl
+        elif legacy.exists():
+            source = legacy
+        else:
+            self._conn.execute(f"PRAGMA user_version = {_MIGRATED_VERSION}")
+            return
+        
         try:
-            data = self.filepath.read_text()
-            expenses_data = json.loads(data)
+            if source is jsonl:
+                with open(jsonl, "r", encoding="utf-8") as f:
+                    expenses_data = [json.loads(line) for line in f if line.strip()]
+            else:
+                expenses_data = json.loads(legacy.read_text(encoding="utf-8"))
             expenses = [Expense.from_dict(exp) for exp in expenses_data]
-            #logger.info(f"Loaded {len(expenses)} expenses from {self.filepath}")
-            return expenses
-        except json.JSONDecodeError as e:
-            logger.error(f"Corrupted JSON file {self.filepath}: {e}")
-            raise Exception(f"Error: Corrupted data file. Please check {self.filepath}")
-        except Exception as e:
-            logger.error(f"Error reading expenses file: {e}")
-            raise Exception(f"Error: Could not read expenses file: {e}")
+            for exp in expenses:
+                # Older files may hold categories that were never normalized
+                exp.category = exp.category.strip().lower()
+                # and nulls where the model has defaults
+                if exp.note is None:
+                    exp.note = ""
+                if exp.currency is None:
+                    exp.currency = "BDT"
+            expenses.sort(key=lambda x: x.date)
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error("Corrupted JSON file %s: %s", source, e)
+            raise Exception(f"Error: Corrupted data file. Please check {source}")
+        
+        seen = set()
+        for exp in expenses:
+            if exp.id in seen:
+                raise Exception(f"Error: Duplicate expense ID {exp.id} in {source}")
+            seen.add(exp.id)
+        
+        existing = {row[0] for row in self._conn.execute("SELECT id FROM expense")}
+        rows = [self._to_row(exp) for exp in expenses if exp.id not in existing]
+        
+        try:
+            with self._conn:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(_INSERT, rows)
+                self._conn.execute(f"PRAGMA user_version = {_MIGRATED_VERSION}")
+        except sqlite3.IntegrityError as e:
+            logger.error("Invalid expense data in %s: %s", source, e)
+            raise Exception(f"Error: Invalid expense data in {source}: {e}")
+        logger.info("Migrated %d expenses from %s to %s", len(rows), source, self.filepath)
+    
+    def close(self):
+        """Close the database connection."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    @staticmethod
+    def _from_row(row: tuple) -> Expense:
+        """
+        Build an expense from a row tuple in column order.
+        
+        Category and currency repeat across many rows, so they are
+        interned to share one string object per distinct value.
+        """
+        expense_id, date, category, amount, note, currency, created_at = row
+        return Expense(
+            expense_id, date, sys.intern(category), amount, note, sys.intern(currency), created_at
+        )
+    
+    @staticmethod
+    def _to_row(expense: Expense) -> tuple:
+        """Convert an expense to a row tuple in column order."""
+        return tuple(getattr(expense, column) for column in _COLUMNS)
+    
+    @staticmethod
+    def _where(
+        month: Optional[str] = None,
+        category: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None
+    ) -> Tuple[str, list]:
+        """
+        Build a WHERE clause for the given filters.
+        
+        Month is expressed as a date range so the date index is used.
+        
+        Returns:
+            Tuple of (SQL fragment, parameters); the fragment is empty if
+            no filter is set
+        """
+        conditions = []
+        params = []
+        
+        if month:
+            conditions.append("date >= ? AND date <= ?")
+            params += [month, f"{month}-99"]
+        if from_date:
+            conditions.append("date >= ?")
+            params.append(from_date)
+        if to_date:
+            conditions.append("date <= ?")
+            params.append(to_date)
+        if category:
+            conditions.append("category = ?")
+            params.append(category)
+        if min_amount is not None:
+            conditions.append("amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            conditions.append("amount <= ?")
+            params.append(max_amount)
+        
+        if not conditions:
+            return "", params
+        return " WHERE " + " AND ".join(conditions), params
+    
+    def query(
+        self,
+        month: Optional[str] = None,
+        category: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None,
+        sort_by: str = "date",
+        descending: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Expense]:
+        """
+        Get filtered and sorted expenses with a single indexed query.
+        
+        Args:
+            month: Month in YYYY-MM format
+            category: Lower-cased category name
+            min_amount: Minimum amount, inclusive
+            max_amount: Maximum amount, inclusive
+            from_date: Start date (YYYY-MM-DD), inclusive
+            to_date: End date (YYYY-MM-DD), inclusive
+            sort_by: Field to sort by (date, amount, category)
+            descending: Sort in descending order
+            limit: Maximum number of results
+        
+        Returns:
+            List of matching Expense objects
+        """
+        where, params = self._where(month, category, min_amount, max_amount, from_date, to_date)
+        order = _ORDER_BY.get(sort_by, _ORDER_BY["date"]).format(
+            direction="DESC" if descending else "ASC"
+        )
+        sql = f"{_SELECT}{where} ORDER BY {order}"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        
+        return [self._from_row(row) for row in self._conn.execute(sql, params)]
     
-    def save_expenses(self, expenses: List[Expense]):
+    def category_totals(
+        self,
+        month: Optional[str] = None,
+        category: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None
+    ) -> List[Tuple[str, int, float, float]]:
         """
-        Save all expenses to file.
+        Aggregate matching expenses per category.
         
         Args:
-            expenses: List of Expense objects to save
+            month: Month in YYYY-MM format
+            category: Lower-cased category name
+            from_date: Start date (YYYY-MM-DD), inclusive
+            to_date: End date (YYYY-MM-DD), inclusive
+        
+        Returns:
+            List of (category, count, total amount, highest amount) rows
+        """
+        where, params = self._where(month, category, from_date=from_date, to_date=to_date)
+        sql = (
+            f"SELECT category, COUNT(*), SUM(amount), MAX(amount) FROM expense{where} "
+            "GROUP BY category"
+        )
+        return self._conn.execute(sql, params).fetchall()
+    
+    def first_currency(
+        self,
+        month: Optional[str] = None,
+        category: Optional[str] = None,
+        from_date: Optional[str] = None,
+        to_date: Optional[str] = None
+    ) -> Optional[str]:
+        """
+        Get the currency of the earliest matching expense.
+        
+        Args:
+            month: Month in YYYY-MM format
+            category: Lower-cased category name
+            from_date: Start date (YYYY-MM-DD), inclusive
+            to_date: End date (YYYY-MM-DD), inclusive
             
-        Raises:
-            Exception: If file cannot be written
+        Returns:
+            Currency code, or None if nothing matches
         """
-        try:
-            expenses_data = [exp.to_dict() for exp in expenses]
-            data = json.dumps(expenses_data, indent=2)
-            self.filepath.write_text(data)
-            logger.info(f"Saved {len(expenses)} expenses to {self.filepath}")
-        except Exception as e:
-            logger.error(f"Error writing expenses file: {e}")
-            raise Exception(f"Error: Could not save expenses: {e}")
+        where, params = self._where(month, category, from_date=from_date, to_date=to_date)
+        row = self._conn.execute(
+            f"SELECT currency FROM expense{where} ORDER BY date, rowid LIMIT 1", params
+        ).fetchone()
+        return row[0] if row else None
     
     def add_expense(self, expense: Expense):
         """
@@ -84,24 +315,40 @@ class ExpenseStorage:
         
         Args:
             expense: Expense object to add
+        
+        Raises:
+            Exception: If the database cannot be written
         """
-        expenses = self.load_expenses()
-        expenses.append(expense)
-        self.save_expenses(expenses)
-        #logger.info(f"Added expense: {expense.id}")
+        try:
+            with self._conn:
+                self._conn.execute(_INSERT, self._to_row(expense))
+        except sqlite3.Error as e:
+            logger.error("Error writing expenses database: %s", e)
+            raise Exception(f"Error: Could not save expenses: {e}")
     
-    def get_all_ids(self) -> List[str]:
+    def next_id(self, date: str) -> str:
         """
-        Get all existing expense IDs.
+        Reserve the next expense ID for a date.
         
+        The highest sequence number for a date is read once with a range
+        scan over the primary key, then kept in a per-date counter.
+        
+        Args:
+            date: Date string in YYYY-MM-DD format
+            
         Returns:
-            List of expense IDs
+            Unique expense ID in format EXP-YYYYMMDD-NNNN
         """
-        try:
-            expenses = self.load_expenses()
-            return [exp.id for exp in expenses]
-        except Exception:
-            return []
+        if date not in self._max_seq_by_date:
+            prefix = f"EXP-{date.replace('-', '')}-"
+            row = self._conn.execute(
+                "SELECT MAX(CAST(substr(id, ?) AS INTEGER)) FROM expense WHERE id >= ? AND id < ?",
+                (len(prefix) + 1, prefix, prefix[:-1] + "."),
+            ).fetchone()
+            self._max_seq_by_date[date] = row[0] or 0
+        
+        self._max_seq_by_date[date] += 1
+        return generate_expense_id(date, self._max_seq_by_date[date])
     
     def delete_expense(self, expense_id: str) -> bool:
         """
@@ -109,19 +356,13 @@ class ExpenseStorage:
         
         Args:
             expense_id: ID of expense to delete
-            
+        
         Returns:
             True if deleted, False if not found
         """
-        expenses = self.load_expenses()
-        original_count = len(expenses)
-        expenses = [exp for exp in expenses if exp.id != expense_id]
-        
-        if len(expenses) < original_count:
-            self.save_expenses(expenses)
-            #logger.info(f"Deleted expense: {expense_id}")
-            return True
-        return False
+        with self._conn:
+            cursor = self._conn.execute("DELETE FROM expense WHERE id = ?", (expense_id,))
+        return cursor.rowcount > 0
     
     def update_expense(self, expense_id: str, updates: dict) -> Optional[Expense]:
         """
@@ -130,20 +371,24 @@ class ExpenseStorage:
         Args:
             expense_id: ID of expense to update
             updates: Dictionary of fields to update
-            
+        
         Returns:
             Updated Expense object or None if not found
+        
+        Raises:
+            ValueError: If an update names an unknown field
         """
-        expenses = self.load_expenses()
+        unknown = set(updates) - set(_COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"cannot update field(s): {', '.join(sorted(unknown))}")
         
-        for i, exp in enumerate(expenses):
-            if exp.id == expense_id:
-                # Update fields
-                exp_dict = exp.to_dict()
-                exp_dict.update(updates)
-                expenses[i] = Expense.from_dict(exp_dict)
-                self.save_expenses(expenses)
-                #logger.info(f"Updated expense: {expense_id}")
-                return expenses[i]
+        if updates:
+            assignments = ", ".join(f"{field} = ?" for field in updates)
+            with self._conn:
+                self._conn.execute(
+                    f"UPDATE expense SET {assignments} WHERE id = ?",
+                    [*updates.values(), expense_id],
+                )
         
-        return None
+        row = self._conn.execute(f"{_SELECT} WHERE id = ?", (expense_id,)).fetchone()
+        return self._from_row(row) if row else None
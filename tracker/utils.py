@@ -2,7 +2,7 @@
 Utility functions for expense tracker.
 """
 
-from datetime import datetime
+from datetime import date
 
 
 def validate_date(date_str: str) -> str:
@@ -18,8 +18,11 @@ def validate_date(date_str: str) -> str:
     Raises:
         ValueError: If date format is invalid
     """
+    # fromisoformat also accepts forms like YYYYMMDD, so check the layout first
+    if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+        raise ValueError("date must be YYYY-MM-DD")
     try:
-        datetime.strptime(date_str, "%Y-%m-%d")
+        date.fromisoformat(date_str)
         return date_str
     except ValueError:
         raise ValueError("date must be YYYY-MM-DD")
@@ -43,22 +46,16 @@ def validate_amount(amount: float) -> float:
     return amount
 
 
-def generate_expense_id(date: str, existing_ids: list[str]) -> str:
+def generate_expense_id(date: str, seq: int) -> str:
     """
     Generate unique expense ID in format EXP-YYYYMMDD-NNNN.
     
     Args:
         date: Date string in YYYY-MM-DD format
-        existing_ids: List of existing expense IDs
+        seq: Sequence number of the expense within that date
         
     Returns:
         Unique expense ID
     """
     date_part = date.replace("-", "")
-    prefix = f"EXP-{date_part}-"
-    if not existing_ids:
-        return f"{prefix}0001"
-    last_id = existing_ids[-1]
-    next_num = int(last_id.split("-")[-1]) + 1
-    
-    return f"{prefix}{next_num:04d}"
+    return f"EXP-{date_part}-{seq:04d}"